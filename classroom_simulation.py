@@ -1,7 +1,141 @@
 import pygame
+import pygame.freetype
 import numpy as np
 import matplotlib.pyplot as plt
 import sys
+import multiprocessing
+from queue import Empty, Full
+from numba import njit
+
+@njit(cache=True, fastmath=True)
+def _compute_metrics(learning_speeds, demand, threshold):
+    """Compiled capacity ratio and pass probability kernel for a whole class"""
+    ratios = learning_speeds / demand
+    probs = 1.0 / (1.0 + np.exp(-5 * (ratios - threshold)))
+    return ratios, probs
+
+@njit(cache=True)
+def _ratios_to_sprites(ratios, threshold, shades):
+    """Compiled mapping from capacity ratios to circle sprite indices"""
+    sprites = np.empty(ratios.shape[0], dtype=np.int64)
+    for i in range(ratios.shape[0]):
+        cr = ratios[i]
+        if cr >= threshold:
+            # Green for passing - brighter green for higher ratios
+            boost = int(105 * (cr - threshold))
+            intensity = 150 + (boost if boost < 105 else 105)
+            sprites[i] = shades + (intensity - 150) * shades // 106
+        else:
+            # Red for failing - brighter red for worse ratios
+            severity = (threshold - cr) / threshold
+            intensity = 150 + int(105 * (severity if severity < 1.0 else 1.0))
+            sprites[i] = (intensity - 150) * shades // 106
+    return sprites
+
+# Columns of the per-student state array
+POS_X, POS_Y, SPEED, CR = range(4)
+
+# Number of pre-rendered intensity shades per circle color
+CIRCLE_SHADES = 8
+
+class PlotWindow:
+    """Matplotlib analytics window, redrawn by blitting over cached backgrounds"""
+    def __init__(self, passing_threshold, max_students, history_size):
+        self.passing_threshold = passing_threshold
+        
+        self.fig, (self.ax1, self.ax2) = plt.subplots(1, 2, figsize=(12, 5))
+        plt.subplots_adjust(wspace=0.3)
+        
+        # Plot 1: Capacity ratio distribution with fixed axes so the background stays valid
+        self.hist_bins = np.linspace(0, 3, 9)
+        self.hist_patches = self.ax1.bar(self.hist_bins[:-1], np.zeros(8), width=np.diff(self.hist_bins),
+                                         align='edge', alpha=0.7, edgecolor='black', animated=True)
+        
+        self.ax1.axvline(self.passing_threshold, color='red', linestyle='--', linewidth=2, label='Passing Threshold')
+        self.ax1.set_xlim(self.hist_bins[0], self.hist_bins[-1])
+        self.ax1.set_ylim(0, max_students)
+        self.ax1.set_xlabel('Capacity Ratio')
+        self.ax1.set_ylabel('Number of Students')
+        self.ax1.set_title('Distribution of Student Capacity Ratios')
+        self.ax1.legend()
+        self.ax1.grid(True, alpha=0.3)
+        
+        # Plot 2: Fail rate history
+        self.fail_line, = self.ax2.plot([], [], 'r-', linewidth=2, label='Fail Rate', animated=True)
+        self.fail_fill = self.ax2.fill_between([], [], alpha=0.3, color='red', animated=True)
+        self.ax2.set_xlim(0, history_size)
+        self.ax2.set_ylim(0, 100)
+        self.ax2.set_xlabel('Time Steps')
+        self.ax2.set_ylabel('Fail Rate (%)')
+        self.ax2.set_title('Fail Rate Over Time')
+        self.ax2.legend()
+        self.ax2.grid(True, alpha=0.3)
+        
+        # Re-capture the backgrounds whenever matplotlib does a full redraw (e.g. window resize)
+        self.fig.canvas.mpl_connect('draw_event', self.on_draw)
+        plt.show(block=False)
+        self.fig.canvas.draw()
+    
+    def on_draw(self, event):
+        """Cache the static plot backgrounds after a full redraw"""
+        self.bg1 = self.fig.canvas.copy_from_bbox(self.ax1.bbox)
+        self.bg2 = self.fig.canvas.copy_from_bbox(self.ax2.bbox)
+        self.draw_artists()
+    
+    def draw_artists(self):
+        """Draw the dynamic plot artists on top of the cached backgrounds"""
+        for patch in self.hist_patches:
+            self.ax1.draw_artist(patch)
+        self.ax2.draw_artist(self.fail_fill)
+        self.ax2.draw_artist(self.fail_line)
+    
+    def update(self, capacity_ratios, fail_rates):
+        """Update the plots with the latest class state"""
+        # Plot 1: Capacity ratio distribution, outliers pile into the edge bins
+        clipped = np.clip(capacity_ratios, self.hist_bins[0], self.hist_bins[-1])
+        counts, _ = np.histogram(clipped, bins=self.hist_bins)
+        
+        # Color individual bars based on threshold
+        for patch, count, left in zip(self.hist_patches, counts, self.hist_bins[:-1]):
+            patch.set_height(count)
+            patch.set_facecolor('lightgreen' if left >= self.passing_threshold else 'lightcoral')
+        
+        # Plot 2: Fail rate history
+        if len(fail_rates) > 0:
+            time_steps = np.arange(len(fail_rates))
+            self.fail_line.set_data(time_steps, fail_rates)
+            self.fail_fill.remove()
+            self.fail_fill = self.ax2.fill_between(time_steps, fail_rates, alpha=0.3, color='red', animated=True)
+        
+        # Blit only the dynamic artists over the cached backgrounds
+        canvas = self.fig.canvas
+        canvas.restore_region(self.bg1)
+        canvas.restore_region(self.bg2)
+        self.draw_artists()
+        canvas.blit(self.ax1.bbox)
+        canvas.blit(self.ax2.bbox)
+
+def _plot_worker(queue, passing_threshold, max_students, history_size):
+    """Plot process entry point: draw the newest queued data until told to stop"""
+    window = PlotWindow(passing_threshold, max_students, history_size)
+    
+    while plt.fignum_exists(window.fig.number):
+        # Skip stale updates, only the newest one is worth drawing
+        latest = None
+        try:
+            while True:
+                item = queue.get_nowait()
+                if item is None:
+                    plt.close(window.fig)
+                    return
+                latest = item
+        except Empty:
+            pass
+        
+        if latest is not None:
+            window.update(*latest)
+        # Service GUI events without the full redraw plt.pause would trigger
+        window.fig.canvas.start_event_loop(0.01)
 
 class EducationalSystemSimulation:
     def __init__(self, num_students=25):
@@ -9,12 +143,27 @@ class EducationalSystemSimulation:
         self.setup_parameters()
         self.setup_pygame()
         self.setup_students()
-        self.history = []
+        self.setup_history()
         
-        # Setup matplotlib in interactive mode
-        plt.ion()
-        self.fig, (self.ax1, self.ax2) = plt.subplots(1, 2, figsize=(12, 5))
-        plt.subplots_adjust(wspace=0.3)
+        # Simulate at 5 Hz and render at ~15 Hz, each only when its inputs changed
+        self._sim_interval = 200
+        self._last_sim_tick = -self._sim_interval
+        self._pygame_dirty = True
+        self._render_interval = 67
+        self._last_render_tick = -self._render_interval
+        
+        # Redraw the plots only when their inputs changed, at most every _plot_interval ms
+        self._plot_dirty = True
+        self._plot_interval = 200
+        self._last_plot_tick = -self._plot_interval
+        
+        # Run matplotlib in its own process so plotting never blocks the Pygame loop
+        ctx = multiprocessing.get_context('spawn')
+        self._plot_queue = ctx.Queue(maxsize=2)
+        self._plot_proc = ctx.Process(target=_plot_worker, daemon=True, args=(
+            self._plot_queue, self.passing_threshold, self.param_ranges['class_size'][1], self.history_size))
+        self._plot_proc.start()
+        self._plot_alive = True
         
     def setup_parameters(self):
         # Initial students parameters
@@ -48,21 +197,64 @@ class EducationalSystemSimulation:
         demand = self.compute_effective_demand()
         return learning_speed / demand
     
+    def compute_metrics(self):
+        """Capacity ratios, pass probabilities and effective demand for the current class"""
+        # Always hand the kernel floats so slider drags never trigger a recompile
+        demand = float(self.compute_effective_demand())
+        ratios, probs = _compute_metrics(self._students[:, SPEED], demand, float(self.passing_threshold))
+        return ratios, probs, demand
+    
+    def compute_student_sprites(self, capacity_ratios):
+        """Map capacity ratios to circle sprite indices with a smooth gradient"""
+        return _ratios_to_sprites(capacity_ratios, self.passing_threshold, CIRCLE_SHADES)
+    
     def probability_of_passing(self, capacity_ratio, sharpness=5):
         """Smooth probability function using logistic curve"""
         return 1 / (1 + np.exp(-sharpness * (capacity_ratio - self.passing_threshold)))
     
     def setup_students(self):
         """Initialize student population with varied learning speeds"""
-        self.learning_speeds = np.random.normal(loc=1.1, scale=0.25, size=self.num_students)
-        # Ensure no negative learning speeds
-        self.learning_speeds = np.maximum(0.3, self.learning_speeds)
+        # Fill one buffer for the largest class; the active class is a view into it
+        pool_size = max(self.num_students, self.param_ranges['class_size'][1])
+        self._students_pool = np.empty((pool_size, 4), dtype=np.float32)
         
         # Random positions for visualization
-        self.student_positions = [
-            (np.random.randint(40, 360), np.random.randint(60, 340))
-            for _ in range(self.num_students)
-        ]
+        self._students_pool[:, POS_X] = np.random.randint(40, 360, size=pool_size)
+        self._students_pool[:, POS_Y] = np.random.randint(60, 340, size=pool_size)
+        
+        self._students_pool[:, SPEED] = np.random.normal(loc=1.1, scale=0.25, size=pool_size)
+        # Ensure no negative learning speeds
+        np.maximum(0.3, self._students_pool[:, SPEED], out=self._students_pool[:, SPEED])
+        self._students_pool[:, CR] = 0
+        
+        self.select_students()
+    
+    def select_students(self):
+        """Point the active student array at the first num_students pool rows"""
+        self._students = self._students_pool[:self.num_students]
+    
+    def setup_history(self):
+        """Allocate ring buffers holding the last history_size simulation steps"""
+        self.history_size = 50
+        self._hist_fail = np.zeros(self.history_size)
+        self._hist_avg = np.zeros(self.history_size)
+        self._hist_demand = np.zeros(self.history_size)
+        self._hist_head = 0  # Next slot to write
+        self._hist_len = 0
+    
+    def record_history(self, fail_rate, avg_capacity_ratio, demand):
+        """Store one step in the history ring buffers, overwriting the oldest"""
+        self._hist_fail[self._hist_head] = fail_rate
+        self._hist_avg[self._hist_head] = avg_capacity_ratio
+        self._hist_demand[self._hist_head] = demand
+        self._hist_head = (self._hist_head + 1) % self.history_size
+        self._hist_len = min(self._hist_len + 1, self.history_size)
+    
+    def ordered_history(self, buffer):
+        """Return the recorded entries of a history buffer, oldest first"""
+        if self._hist_len < self.history_size:
+            return buffer[:self._hist_len]
+        return np.concatenate((buffer[self._hist_head:], buffer[:self._hist_head]))
     
     def setup_pygame(self):
         """Initialize Pygame components within small window"""
@@ -70,8 +262,18 @@ class EducationalSystemSimulation:
         self.screen = pygame.display.set_mode((400, 500))
         pygame.display.set_caption("Education System Simulation")
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 22)
-        self.small_font = pygame.font.Font(None, 18)
+        
+        # freetype can render text straight onto a target surface
+        pygame.freetype.init()
+        self.font = pygame.freetype.Font(None, 15)
+        self.small_font = pygame.freetype.Font(None, 12)
+        # Pad text boxes to the full line height so rows line up regardless of glyphs
+        self.font.pad = True
+        self.small_font.pad = True
+        
+        # Capacity ratio labels keyed by the ratio in tenths
+        self._cr_labels = {i: self.small_font.render(f"{i / 10:.1f}", (255, 255, 255))[0]
+                           for i in range(-50, 100)}
         
         # Create sliders
         self.sliders = {
@@ -80,6 +282,100 @@ class EducationalSystemSimulation:
             'curriculum_intensity': {'value': self.curriculum_content, 'rect': pygame.Rect(20, 460, 160, 15), 'dragging': False},
             'time_available': {'value': self.time_allotted, 'rect': pygame.Rect(20, 485, 160, 15), 'dragging': False}
         }
+        
+        for name in self.sliders:
+            self._recompute_handle_rect(name)
+        
+        # Clicks outside every slider (handles overhang the tracks) can be rejected at once
+        track_rects = [slider['rect'] for slider in self.sliders.values()]
+        self._sliders_bbox = track_rects[0].unionall(track_rects[1:]).inflate(8, 6)
+        self._active_slider = None
+        
+        self.slider_layout = [
+            ('class_size', 410, "Class Size", 5, 40),
+            ('teacher_skill', 435, "Teacher Skill", 0.1, 1.0),
+            ('curriculum_intensity', 460, "Curriculum", 50, 200),
+            ('time_available', 485, "Time", 30, 120)
+        ]
+        
+        self.setup_circle_sprites()
+        self.setup_info_panel()
+        self.setup_background()
+    
+    def setup_background(self):
+        """Render the static window chrome once and queue a full first update"""
+        self._background = pygame.Surface(self.screen.get_size())
+        self._background.fill((35, 35, 45))  # Dark blue-gray background
+        
+        # Draw title and model equation
+        self.font.render_to(self._background, (20, 10), "Educational System Simulation", (255, 255, 200))
+        
+        self.small_font.render_to(self._background, (20, 35), "Capacity Ratio = Learning Speed / Effective Demand",
+                                  (200, 200, 255))
+        
+        self.small_font.render_to(self._background, (20, 390), "Adjust System Parameters:", (255, 255, 200))
+        
+        # Regions repainted every frame, and the screen rects to push at frame end
+        self.student_area = pygame.Rect(0, 50, 400, 325)
+        self._changed_sliders = set(self.sliders)
+        self.screen.blit(self._background, (0, 0))
+        self._dirty = [self.screen.get_rect()]
+    
+    def setup_circle_sprites(self):
+        """Pre-render student circles in CIRCLE_SHADES red shades followed by as many green ones"""
+        self._circle_sprites = []
+        for channel in (0, 1):
+            for shade in range(CIRCLE_SHADES):
+                color = [0, 0, 0]
+                color[channel] = 150 + round(105 * shade / (CIRCLE_SHADES - 1))
+                
+                sprite = pygame.Surface((14, 14), pygame.SRCALPHA)
+                pygame.draw.circle(sprite, color, (7, 7), 6)
+                pygame.draw.circle(sprite, (255, 255, 255), (7, 7), 6, 1)  # White border
+                self._circle_sprites.append(sprite)
+    
+    def setup_info_panel(self):
+        """Pre-render the static parts of the info panel and record the value rows"""
+        self.info_rect = pygame.Rect(220, 60, 170, 340)
+        self._info_static_surf = pygame.Surface(self.info_rect.size, pygame.SRCALPHA)
+        panel_rect = self._info_static_surf.get_rect()
+        pygame.draw.rect(self._info_static_surf, (50, 50, 60), panel_rect, border_radius=5)
+        pygame.draw.rect(self._info_static_surf, (100, 100, 120), panel_rect, 1, border_radius=5)
+        
+        # None marks a row filled with simulation values from _info_fmt
+        info_lines = [
+            "SYSTEM STATUS", None, None, None, None, None,
+            "",
+            "RESULTS", None, None, None,
+            "",
+            "CONTROLS",
+            "< Drag sliders >",
+            "to adjust parameters",
+            "R: reshuffle students"
+        ]
+        
+        self._info_value_rows = []
+        info_y = 70
+        for i, line in enumerate(info_lines):
+            if line is None:
+                self._info_value_rows.append(info_y)
+            elif line:
+                color = (255, 255, 200) if i in [0, 7, 12] else (255, 255, 255)
+                self.small_font.render_to(self._info_static_surf, (230 - self.info_rect.left, info_y - self.info_rect.top),
+                                          line, color)
+            info_y += 20 if i in [0, 6, 11, 12] else 18
+        
+        # Template for all value rows, one line per row
+        self._info_fmt = ("Students: {}\nTeacher Skill: {:.2f}\nCurriculum: {:.0f}\nTime: {:.0f} min\n"
+                          "Demand: {:.2f}\nFail Rate: {:.1f}%\nAvg Ratio: {:.2f}\nPassing: {}/{}")
+    
+    def _recompute_handle_rect(self, name):
+        """Cache the handle rect for a slider's current value"""
+        slider = self.sliders[name]
+        rect = slider['rect']
+        min_val, max_val = self.param_ranges[name]
+        handle_x = rect.left + (slider['value'] - min_val) / (max_val - min_val) * rect.width
+        slider['handle_rect'] = pygame.Rect(handle_x - 4, rect.top - 3, 8, 21)
     
     def update_parameters(self):
         """Update simulation parameters from sliders"""
@@ -89,75 +385,120 @@ class EducationalSystemSimulation:
         self.time_allotted = self.sliders['time_available']['value']
         
         # Update student population if class size changed
-        if len(self.learning_speeds) != self.num_students:
-            self.setup_students()
+        if len(self._students) != self.num_students:
+            self.select_students()
     
     def draw_slider(self, name, y_pos, label, min_val, max_val):
         """Draw a slider control"""
         slider = self.sliders[name]
         rect = slider['rect']
         
+        # Repaint the whole slider row, covering the old handle and label
+        row_rect = pygame.Rect(0, rect.top - 4, self.screen.get_width(), rect.height + 8)
+        self.screen.blit(self._background, row_rect, row_rect)
+        self._dirty.append(row_rect)
+        
         # Draw slider track
         pygame.draw.rect(self.screen, (80, 80, 80), rect, border_radius=2)
         pygame.draw.rect(self.screen, (120, 120, 120), rect, 1, border_radius=2)
         
-        # Calculate handle position
-        handle_x = rect.left + (slider['value'] - min_val) / (max_val - min_val) * rect.width
-        handle_rect = pygame.Rect(handle_x - 4, rect.top - 3, 8, 21)
-        
         # Draw handle
+        handle_rect = slider['handle_rect']
         color = (220, 120, 120) if slider['dragging'] else (200, 200, 200)
         pygame.draw.rect(self.screen, color, handle_rect, border_radius=2)
         pygame.draw.rect(self.screen, (100, 100, 100), handle_rect, 1, border_radius=2)
         
         # Draw label and value
         label_text = f"{label}: {slider['value']:.1f}"
-        text_surf = self.small_font.render(label_text, True, (255, 255, 255))
-        self.screen.blit(text_surf, (rect.right + 8, rect.top - 4))
+        self.small_font.render_to(self.screen, (rect.right + 8, rect.top - 4), label_text, (255, 255, 255))
     
-    def update_matplotlib_plot(self):
-        """Update the matplotlib plots in separate window"""
-        # Clear previous plots
-        self.ax1.clear()
-        self.ax2.clear()
+    def update_matplotlib_plot(self, capacity_ratios):
+        """Send the current plot data to the matplotlib process"""
+        if not self._plot_proc.is_alive():
+            print(f"Plot process exited (exit code {self._plot_proc.exitcode}), analytics window disabled")
+            self._plot_alive = False
+            return False
         
-        # Calculate current data
-        capacity_ratios = [self.compute_capacity_ratio(speed) for speed in self.learning_speeds]
+        # Copy the history view, the queue pickles it later on a feeder thread
+        fail_rates = self.ordered_history(self._hist_fail).copy()
+        try:
+            self._plot_queue.put_nowait((capacity_ratios, fail_rates))
+        except Full:
+            # The plot process is behind; retry on a later tick
+            return False
+        return True
+    
+    def step_simulation(self):
+        """Apply slider values and recompute the class state and history"""
+        self.update_parameters()
         
-        # Plot 1: Capacity ratio distribution
-        colors = ['green' if cr >= self.passing_threshold else 'red' for cr in capacity_ratios]
-        n, bins, patches = self.ax1.hist(capacity_ratios, bins=8, alpha=0.7, color='lightblue', edgecolor='black')
+        # Calculate current state
+        capacity_ratios, _, self._demand = self.compute_metrics()
+        self._capacity_ratios = capacity_ratios
+        self._avg_cr = float(capacity_ratios.mean())
+        self._fail_count = int(np.count_nonzero(capacity_ratios < self.passing_threshold))
+        self._fail_rate = (self._fail_count / self.num_students) * 100
         
-        # Color individual bars based on threshold
-        for i, (patch, bin_edge) in enumerate(zip(patches, bins)):
-            if bin_edge < self.passing_threshold:
-                patch.set_facecolor('lightcoral')
-            else:
-                patch.set_facecolor('lightgreen')
+        # Students, info panel and histogram only change with the capacity ratios
+        if not np.array_equal(self._students[:, CR], capacity_ratios.astype(np.float32)):
+            self._pygame_dirty = True
+            self._plot_dirty = True
+        self._students[:, CR] = capacity_ratios
         
-        self.ax1.axvline(self.passing_threshold, color='red', linestyle='--', linewidth=2, label='Passing Threshold')
-        self.ax1.set_xlabel('Capacity Ratio')
-        self.ax1.set_ylabel('Number of Students')
-        self.ax1.set_title('Distribution of Student Capacity Ratios')
-        self.ax1.legend()
-        self.ax1.grid(True, alpha=0.3)
+        # The fail rate plot keeps scrolling until the window holds only the newest value
+        recorded = self._hist_fail[:self._hist_len]
+        if (self._hist_len < self.history_size or self._fail_rate != self._hist_fail[self._hist_head - 1]
+                or np.ptp(recorded) != 0):
+            self._plot_dirty = True
         
-        # Plot 2: Fail rate history
-        if len(self.history) > 0:
-            fail_rates = [h['fail_rate'] for h in self.history]
-            time_steps = range(len(fail_rates))
-            self.ax2.plot(time_steps, fail_rates, 'r-', linewidth=2, label='Fail Rate')
-            self.ax2.fill_between(time_steps, fail_rates, alpha=0.3, color='red')
-            self.ax2.set_ylim(0, 100)
-            self.ax2.set_xlabel('Time Steps')
-            self.ax2.set_ylabel('Fail Rate (%)')
-            self.ax2.set_title('Fail Rate Over Time')
-            self.ax2.legend()
-            self.ax2.grid(True, alpha=0.3)
-        
-        # Update the plots
-        self.fig.canvas.draw()
-        self.fig.canvas.flush_events()
+        self.record_history(self._fail_rate, self._avg_cr, self._demand)
+    
+    def draw_pygame(self):
+        """Repaint the changed parts of the Pygame window and queue their rects"""
+        if self._pygame_dirty:
+            # Repaint the student area from the static background
+            self.screen.blit(self._background, self.student_area, self.student_area)
+            self._dirty.append(self.student_area)
+            
+            # Draw students in main area
+            student_sprites = self.compute_student_sprites(self._students[:, CR]).tolist()
+            label_keys = np.clip(np.rint(self._students[:, CR] * 10), -50, 99).astype(np.int32).tolist()
+            for (x, y, _, _), sprite, label_key in zip(self._students.tolist(), student_sprites, label_keys):
+                x, y = int(x), int(y)
+                self.screen.blit(self._circle_sprites[sprite], (x - 7, y - 7))
+                
+                # Show capacity ratio as text near student (smaller)
+                cr_text = self._cr_labels[label_key]
+                text_rect = cr_text.get_rect(center=(x, y + 15))
+                self.screen.blit(cr_text, text_rect)
+            
+            # Draw info panel, only the simulation values are rendered per update
+            self.screen.blit(self._info_static_surf, self.info_rect)
+            self._dirty.append(self.info_rect)
+            
+            info_values = (self.num_students, self.teacher_skill, self.curriculum_content, self.time_allotted,
+                           self._demand, self._fail_rate, self._avg_cr,
+                           self.num_students - self._fail_count, self.num_students)
+            lines = self._info_fmt.format(*info_values).split("\n")
+            for info_y, line in zip(self._info_value_rows, lines):
+                self.small_font.render_to(self.screen, (230, info_y), line, (255, 255, 255))
+            self._pygame_dirty = False
+        
+        # Draw sliders whose value or drag state changed
+        for name, y_pos, label, min_val, max_val in self.slider_layout:
+            if name in self._changed_sliders:
+                self.draw_slider(name, y_pos, label, min_val, max_val)
+        self._changed_sliders.clear()
+    
+    def close_plot(self):
+        """Ask the matplotlib process to close its window and wait briefly for it"""
+        if self._plot_proc.is_alive():
+            try:
+                self._plot_queue.put(None, timeout=1)
+            except Full:
+                pass
+        self._plot_proc.join(timeout=2)
+        self._plot_queue.cancel_join_thread()
     
     def run(self):
         """Main simulation loop"""
@@ -168,124 +509,62 @@ class EducationalSystemSimulation:
                 if event.type == pygame.QUIT:
                     running = False
                 
+                # The window contents were lost, push the whole screen again
+                if event.type == pygame.VIDEOEXPOSE:
+                    self._dirty.append(self.screen.get_rect())
+                    self._pygame_dirty = True
+                
+                # Draw a fresh student population
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                    self.setup_students()
+                
                 # Handle slider dragging
-                if event.type == pygame.MOUSEBUTTONDOWN:
+                if event.type == pygame.MOUSEBUTTONDOWN and self._sliders_bbox.collidepoint(event.pos):
                     for name, slider in self.sliders.items():
-                        handle_x = slider['rect'].left + (slider['value'] - self.param_ranges[name][0]) / (
-                            self.param_ranges[name][1] - self.param_ranges[name][0]) * slider['rect'].width
-                        handle_rect = pygame.Rect(handle_x - 4, slider['rect'].top - 3, 8, 21)
-                        
-                        if handle_rect.collidepoint(event.pos):
+                        if slider['handle_rect'].collidepoint(event.pos):
                             slider['dragging'] = True
+                            self._active_slider = name
+                            self._changed_sliders.add(name)
+                            break
                 
-                if event.type == pygame.MOUSEBUTTONUP:
-                    for slider in self.sliders.values():
-                        slider['dragging'] = False
+                if event.type == pygame.MOUSEBUTTONUP and self._active_slider is not None:
+                    self.sliders[self._active_slider]['dragging'] = False
+                    self._changed_sliders.add(self._active_slider)
+                    self._active_slider = None
                 
-                if event.type == pygame.MOUSEMOTION:
-                    for name, slider in self.sliders.items():
-                        if slider['dragging']:
-                            rel_x = max(0, min(event.pos[0] - slider['rect'].left, slider['rect'].width))
-                            proportion = rel_x / slider['rect'].width
-                            min_val, max_val = self.param_ranges[name]
-                            slider['value'] = min_val + proportion * (max_val - min_val)
+                if event.type == pygame.MOUSEMOTION and self._active_slider is not None:
+                    slider = self.sliders[self._active_slider]
+                    rel_x = max(0, min(event.pos[0] - slider['rect'].left, slider['rect'].width))
+                    proportion = rel_x / slider['rect'].width
+                    min_val, max_val = self.param_ranges[self._active_slider]
+                    slider['value'] = min_val + proportion * (max_val - min_val)
+                    self._recompute_handle_rect(self._active_slider)
+                    self._changed_sliders.add(self._active_slider)
             
-            # Update simulation
-            self.update_parameters()
+            now = pygame.time.get_ticks()
             
-            # Calculate current state
-            capacity_ratios = [self.compute_capacity_ratio(speed) for speed in self.learning_speeds]
-            fail_count = sum(1 for cr in capacity_ratios if cr < self.passing_threshold)
-            fail_rate = (fail_count / self.num_students) * 100
-            
-            # Record history
-            self.history.append({
-                'fail_rate': fail_rate,
-                'avg_capacity_ratio': np.mean(capacity_ratios),
-                'demand': self.compute_effective_demand()
-            })
-            
-            # Keep history manageable
-            if len(self.history) > 50:
-                self.history.pop(0)
+            # Update simulation
+            if now - self._last_sim_tick >= self._sim_interval:
+                self.step_simulation()
+                self._last_sim_tick = now
             
             # Draw everything in Pygame
-            self.screen.fill((35, 35, 45))  # Dark blue-gray background
-            
-            # Draw title and model equation
-            title_text = self.font.render("Educational System Simulation", True, (255, 255, 200))
-            self.screen.blit(title_text, (20, 10))
-            
-            eq_text = self.small_font.render("Capacity Ratio = Learning Speed / Effective Demand", True, (200, 200, 255))
-            self.screen.blit(eq_text, (20, 35))
-            
-            # Draw students in main area
-            for i, (pos, cr) in enumerate(zip(self.student_positions, capacity_ratios)):
-                # Color based on capacity ratio with smooth gradient
-                if cr >= self.passing_threshold:
-                    # Green for passing - brighter green for higher ratios
-                    green_intensity = 150 + min(105, int(105 * (cr - self.passing_threshold)))
-                    color = (0, green_intensity, 0)
-                else:
-                    # Red for failing - brighter red for worse ratios
-                    severity = min(1.0, (self.passing_threshold - cr) / self.passing_threshold)
-                    red_intensity = 150 + int(105 * severity)
-                    color = (red_intensity, 0, 0)
-                
-                pygame.draw.circle(self.screen, color, pos, 6)
-                pygame.draw.circle(self.screen, (255, 255, 255), pos, 6, 1)  # White border
-                
-                # Show capacity ratio as text near student (smaller)
-                cr_text = self.small_font.render(f"{cr:.1f}", True, (255, 255, 255))
-                text_rect = cr_text.get_rect(center=(pos[0], pos[1] + 15))
-                self.screen.blit(cr_text, text_rect)
-            
-            # Draw info panel
-            info_bg_rect = pygame.Rect(220, 60, 170, 340)
-            pygame.draw.rect(self.screen, (50, 50, 60), info_bg_rect, border_radius=5)
-            pygame.draw.rect(self.screen, (100, 100, 120), info_bg_rect, 1, border_radius=5)
-            
-            info_y = 70
-            info_lines = [
-                "SYSTEM STATUS",
-                f"Students: {self.num_students}",
-                f"Teacher Skill: {self.teacher_skill:.2f}",
-                f"Curriculum: {self.curriculum_content:.0f}",
-                f"Time: {self.time_allotted:.0f} min",
-                f"Demand: {self.compute_effective_demand():.2f}",
-                "",
-                "RESULTS",
-                f"Fail Rate: {fail_rate:.1f}%",
-                f"Avg Ratio: {np.mean(capacity_ratios):.2f}",
-                f"Passing: {self.num_students - fail_count}/{self.num_students}",
-                "",
-                "CONTROLS",
-                "< Drag sliders >",
-                "to adjust parameters"
-            ]
-            
-            for i, line in enumerate(info_lines):
-                color = (255, 255, 200) if i in [0, 7, 12] else (255, 255, 255)
-                text_surf = self.small_font.render(line, True, color)
-                self.screen.blit(text_surf, (230, info_y))
-                info_y += 20 if i in [0, 6, 11, 12] else 18
-            
-            # Draw sliders
-            slider_title = self.small_font.render("Adjust System Parameters:", True, (255, 255, 200))
-            self.screen.blit(slider_title, (20, 390))
-            
-            self.draw_slider('class_size', 410, "Class Size", 5, 40)
-            self.draw_slider('teacher_skill', 435, "Teacher Skill", 0.1, 1.0)
-            self.draw_slider('curriculum_intensity', 460, "Curriculum", 50, 200)
-            self.draw_slider('time_available', 485, "Time", 30, 120)
+            if (self._pygame_dirty or self._changed_sliders) and now - self._last_render_tick >= self._render_interval:
+                self.draw_pygame()
+                pygame.display.update(self._dirty)
+                self._dirty.clear()
+                self._last_render_tick = now
             
             # Update matplotlib plots
-            self.update_matplotlib_plot()
+            if self._plot_alive and self._plot_dirty and now - self._last_plot_tick >= self._plot_interval:
+                if self.update_matplotlib_plot(self._capacity_ratios):
+                    self._plot_dirty = False
+                self._last_plot_tick = now
             
-            pygame.display.flip()
-            self.clock.tick(30)
+            # Poll events quickly; the intervals above pace the actual work
+            self.clock.tick(60)
         
-        plt.close()
+        self.close_plot()
         pygame.quit()
         sys.exit()
 